@@ -5,23 +5,55 @@ Extracts text content from uploaded documents.
 Supports: PDF, DOCX, CSV, TXT
 
 Libraries required (add to Lambda layer or deployment package):
-- PyPDF2 or pdfplumber for PDF parsing
+- PyMuPDF (fitz) for PDF parsing
 - python-docx for Word documents
 - pandas for CSV
 """
 
+import bisect
 import json
 import os
 import boto3
 import re
+from botocore.config import Config
+from botocore.exceptions import ClientError
 from typing import Dict, Any, List
 from io import BytesIO
 
-s3_client = boto3.client('s3')
+# Keepalive holds the S3 connection open across invocations on warm
+# containers; adaptive retries back off automatically on throttling
+s3_client = boto3.client('s3', config=Config(
+    retries={'mode': 'adaptive', 'max_attempts': 3},
+    tcp_keepalive=True,
+))
+
+# Pre-resolve the S3 endpoint's DNS during module import so the lookup
+# happens in the Lambda INIT phase (unbilled CPU) rather than on the
+# first request
+try:
+    import socket
+    from urllib.parse import urlparse
+    socket.getaddrinfo(urlparse(s3_client.meta.endpoint_url).hostname, 443)
+except (OSError, ValueError):
+    pass  # Resolution failures surface on the actual request
 
 # Environment variables
 BUCKET_NAME = os.environ['DOCUMENT_BUCKET_NAME']
 MAX_FILE_SIZE_MB = int(os.environ.get('MAX_FILE_SIZE_MB', '50'))
+# Object tags cost an extra S3 round-trip (~20-40 ms) per document.
+# The upload handler mirrors the fields we need into user metadata,
+# which GetObject already returns - only read tags when asked to.
+READ_S3_TAGS = os.environ.get('READ_S3_TAGS', '0') == '1'
+# Chunk sizing in characters. Titan embeddings accept ~8K tokens
+# (roughly 32K chars), so 1000-char chunks under-used the context by
+# ~8x and cost one Bedrock call each. ~6000 chars is ~1500 tokens -
+# comfortably inside the model limit with far fewer API calls.
+CHUNK_SIZE_CHARS = int(os.environ.get('CHUNK_SIZE_CHARS', '6000'))
+CHUNK_OVERLAP_CHARS = int(os.environ.get('CHUNK_OVERLAP_CHARS', '200'))
+
+# Sentence boundaries for chunk splitting - compiled once so the full
+# text is scanned a single time instead of four rfind passes per chunk
+_SENTENCE_BOUNDARY_RE = re.compile(r'[.!?][ \n]')
 
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -48,8 +80,13 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         "success": true
     }
     """
-    print(f"Received event: {json.dumps(event)}")
-    
+    # Serializing the whole event costs O(payload) CPU and CloudWatch
+    # ingest on every invocation - log a summary instead
+    if os.environ.get('DEBUG_LOG_EVENT'):
+        print(f"Received event: {json.dumps(event)}")
+    else:
+        print(f"Received event with keys: {list(event.keys())}")
+
     try:
         # Extract parameters
         bucket = event.get('bucket')
@@ -60,23 +97,27 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         
         print(f"Processing document: s3://{bucket}/{key}")
         
-        # Download file from S3
+        # Download file from S3 - keep the StreamingBody instead of
+        # materializing the whole object, so parsers can consume it
+        # incrementally without doubling peak memory
         response = s3_client.get_object(Bucket=bucket, Key=key)
-        file_content = response['Body'].read()
-        file_size = len(file_content)
-        
-        print(f"Downloaded file, size: {file_size} bytes")
+        body_stream = response['Body']
+        file_size = response.get('ContentLength', 0)
+
+        print(f"Streaming file, size: {file_size} bytes")
         
         # Get metadata from S3 object
         s3_metadata = response.get('Metadata', {})
         
-        # Get tags from S3 object
-        try:
-            tags_response = s3_client.get_object_tagging(Bucket=bucket, Key=key)
-            tags = {tag['Key']: tag['Value'] for tag in tags_response.get('TagSet', [])}
-        except Exception as e:
-            print(f"Warning: Could not retrieve tags: {str(e)}")
-            tags = {}
+        # Get tags from S3 object (opt-in - the metadata above already
+        # carries the interesting fields)
+        tags = {}
+        if READ_S3_TAGS:
+            try:
+                tags_response = s3_client.get_object_tagging(Bucket=bucket, Key=key)
+                tags = {tag['Key']: tag['Value'] for tag in tags_response.get('TagSet', [])}
+            except ClientError as e:
+                print(f"Warning: Could not retrieve tags: {str(e)}")
         
         # Extract document ID from key
         document_id = extract_document_id(key)
@@ -86,10 +127,16 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         file_extension = file_name.split('.')[-1].lower()
         
         # Parse document based on file type
-        text_content, parsed_metadata = parse_document(file_content, file_extension)
-        
+        text_content, parsed_metadata = parse_document(body_stream, file_size, file_extension)
+
+        # Normalize once here so the chunk offsets below index directly
+        # into the textContent we return - chunks carry offsets only,
+        # not copies of the text
+        text_content = ' '.join(text_content.split())
+
         # Split text into chunks for embedding generation
-        chunks = create_text_chunks(text_content, chunk_size=1000, overlap=100)
+        chunks = create_text_chunks(text_content, chunk_size=CHUNK_SIZE_CHARS,
+                                    overlap=CHUNK_OVERLAP_CHARS, normalize=False)
         
         # Combine metadata
         combined_metadata = {
@@ -129,142 +176,193 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         }
 
 
-def parse_document(file_content: bytes, file_extension: str) -> tuple:
+def parse_document(body_stream: Any, file_size: int, file_extension: str) -> tuple:
     """
     Parse document based on file type.
+
+    body_stream is the S3 StreamingBody - each parser consumes it
+    incrementally rather than requiring a fully buffered bytes blob.
     Returns (text_content, metadata)
     """
     if file_extension == 'pdf':
-        return parse_pdf(file_content)
+        return parse_pdf(body_stream, file_size)
     elif file_extension in ['docx', 'doc']:
-        return parse_docx(file_content)
+        return parse_docx(body_stream.read())
     elif file_extension == 'csv':
-        return parse_csv(file_content)
+        return parse_csv(body_stream)
     elif file_extension == 'txt':
-        return parse_txt(file_content)
+        return parse_txt(body_stream)
     else:
         raise ValueError(f"Unsupported file type: {file_extension}")
 
 
-def parse_pdf(file_content: bytes) -> tuple:
+# PDFs below this size are parsed from memory; larger ones are spooled
+# to /tmp so MuPDF can mmap the file instead of holding it in RAM
+PDF_SPOOL_THRESHOLD_BYTES = 16 * 1024 * 1024
+
+
+def parse_pdf(body_stream: Any, file_size: int) -> tuple:
     """
-    Parse PDF document.
-    
-    Note: This is a simplified implementation.
-    For production, use pdfplumber or PyPDF2:
-    
-    import PyPDF2
-    pdf_reader = PyPDF2.PdfReader(BytesIO(file_content))
-    text = ""
-    for page in pdf_reader.pages:
-        text += page.extract_text()
+    Parse PDF document using PyMuPDF (fitz).
+
+    PyMuPDF binds to the MuPDF C engine, making bulk text extraction
+    roughly an order of magnitude faster than pypdf/pdfplumber, which
+    interpret PDF content streams in pure Python.
     """
+    import fitz  # PyMuPDF
+
+    doc = None
     try:
-        # For this example, we'll simulate PDF parsing
-        # In production, install and use PyPDF2 or pdfplumber
-        text = f"[PDF content placeholder - implement PDF parsing library]\n"
-        text += f"File size: {len(file_content)} bytes\n"
-        text += "Install PyPDF2 or pdfplumber for actual PDF parsing."
-        
+        if file_size and file_size > PDF_SPOOL_THRESHOLD_BYTES:
+            # Spool large PDFs to /tmp in 1 MB pieces - MuPDF mmaps the
+            # file, so peak Lambda memory stays bounded
+            import shutil
+            spool_path = '/tmp/document.pdf'
+            with open(spool_path, 'wb') as f:
+                shutil.copyfileobj(body_stream, f, length=1 << 20)
+            doc = fitz.open(spool_path)
+        else:
+            doc = fitz.open(stream=body_stream.read(), filetype='pdf')
+
+        # "text" is the fast extraction mode; "blocks"/"dict" are slower
+        parts = []
+        for page in doc:
+            parts.append(page.get_text('text'))
+        text = ''.join(parts)
+
         metadata = {
-            'pageCount': 'unknown',
-            'parsingMethod': 'placeholder',
+            'pageCount': doc.page_count,
+            'parsingMethod': 'pymupdf',
         }
-        
+
+        # Include document metadata (title, author, etc.) when present
+        doc_metadata = doc.metadata or {}
+        for field in ('title', 'author', 'subject', 'creationDate'):
+            if doc_metadata.get(field):
+                metadata[f'pdf{field[0].upper()}{field[1:]}'] = doc_metadata[field]
+
         return text, metadata
-    
+
     except Exception as e:
         raise Exception(f"PDF parsing failed: {str(e)}")
 
+    finally:
+        if doc is not None:
+            doc.close()
+
 
 def parse_docx(file_content: bytes) -> tuple:
     """
-    Parse DOCX document.
-    
-    Note: Requires python-docx library:
-    
-    from docx import Document
-    doc = Document(BytesIO(file_content))
-    text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
+    Parse DOCX document using python-docx.
+
+    Extracts paragraph text plus table contents (rows joined with tabs
+    so tabular data stays line-oriented for chunking).
     """
     try:
-        # Placeholder implementation
-        text = f"[DOCX content placeholder - implement python-docx library]\n"
-        text += f"File size: {len(file_content)} bytes\n"
-        text += "Install python-docx for actual DOCX parsing."
-        
+        from docx import Document
+
+        doc = Document(BytesIO(file_content))
+
+        # Collect into a list and join once - avoids quadratic string
+        # concatenation on documents with many paragraphs
+        parts = [paragraph.text for paragraph in doc.paragraphs if paragraph.text]
+
+        for table in doc.tables:
+            for row in table.rows:
+                parts.append('\t'.join(cell.text for cell in row.cells))
+
+        text = '\n'.join(parts)
+
         metadata = {
-            'paragraphCount': 'unknown',
-            'parsingMethod': 'placeholder',
+            'paragraphCount': len(doc.paragraphs),
+            'tableCount': len(doc.tables),
+            'parsingMethod': 'python-docx',
         }
-        
+
         return text, metadata
-    
+
     except Exception as e:
         raise Exception(f"DOCX parsing failed: {str(e)}")
 
 
-def parse_csv(file_content: bytes) -> tuple:
+def parse_csv(body_stream: Any) -> tuple:
     """
     Parse CSV document.
-    
+
     Converts CSV to structured text format.
     """
     try:
-        import csv
-        from io import StringIO
-        
-        # Decode bytes to string
-        text_content = file_content.decode('utf-8')
-        
-        # Parse CSV
-        csv_reader = csv.reader(StringIO(text_content))
-        rows = list(csv_reader)
-        
-        # Convert to text format
-        text_lines = []
-        for i, row in enumerate(rows):
-            if i == 0:
-                # Header row
-                text_lines.append("Headers: " + ", ".join(row))
-            else:
-                # Data rows
-                text_lines.append(f"Row {i}: " + " | ".join(row))
-        
-        text = "\n".join(text_lines)
-        
+        import pandas as pd
+
+        # The pandas C engine parses and decodes in native code, which is
+        # typically 5-20x faster than looping csv.reader rows in Python
+        df = pd.read_csv(
+            body_stream,
+            dtype=str,
+            keep_default_na=False,
+            engine='c',
+            encoding='utf-8',
+        )
+
+        # Vectorized formatting - no per-row Python loop
+        text = "Headers: " + ", ".join(df.columns) + "\n"
+        text += df.to_csv(sep='|', index=False, header=False)
+
         metadata = {
-            'rowCount': len(rows),
-            'columnCount': len(rows[0]) if rows else 0,
-            'parsingMethod': 'csv',
+            'rowCount': len(df),
+            'columnCount': df.shape[1],
+            'parsingMethod': 'pandas-csv',
         }
-        
+
         return text, metadata
-    
+
     except Exception as e:
         raise Exception(f"CSV parsing failed: {str(e)}")
 
 
-def parse_txt(file_content: bytes) -> tuple:
+def parse_txt(body_stream: Any) -> tuple:
     """
     Parse plain text document.
+
+    Decodes incrementally in 64 KB slices so the raw bytes are never
+    held alongside the full decoded string - only the text survives,
+    saving one full copy of the document in RAM.
     """
+    import codecs
+
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    parts = []
+    pending = b''
+    chunk = b''
+
     try:
-        # Decode bytes to string
-        text = file_content.decode('utf-8')
-        
+        while True:
+            # Bytes the decoder is holding from a split multi-byte
+            # sequence - needed to reassemble the raw stream on fallback
+            pending = decoder.getstate()[0]
+            chunk = body_stream.read(65536)
+            if not chunk:
+                parts.append(decoder.decode(b'', final=True))
+                break
+            parts.append(decoder.decode(chunk))
+
+        text = ''.join(parts)
+
         metadata = {
             'characterCount': len(text),
             'lineCount': text.count('\n'),
             'parsingMethod': 'text',
         }
-        
+
         return text, metadata
-    
-    except Exception as e:
-        # Try alternative encodings
+
+    except UnicodeDecodeError as e:
+        # Fall back to latin-1. The already-decoded prefix was valid
+        # UTF-8, so re-encoding it reproduces the original bytes exactly
         try:
-            text = file_content.decode('latin-1')
+            raw = (''.join(parts).encode('utf-8') + pending + chunk
+                   + body_stream.read())
+            text = raw.decode('latin-1')
             metadata = {
                 'characterCount': len(text),
                 'lineCount': text.count('\n'),
@@ -272,70 +370,102 @@ def parse_txt(file_content: bytes) -> tuple:
                 'encoding': 'latin-1',
             }
             return text, metadata
-        except:
+        except Exception:
             raise Exception(f"Text parsing failed: {str(e)}")
 
 
-def create_text_chunks(text: str, chunk_size: int = 1000, overlap: int = 100) -> List[Dict[str, Any]]:
+def create_text_chunks(text: str, chunk_size: int = 1000, overlap: int = 100,
+                       normalize: bool = True) -> List[Dict[str, Any]]:
     """
     Split text into overlapping chunks for embedding generation.
-    
+
+    Thin list wrapper around iter_chunks - kept for callers that need
+    random access; streaming consumers should iterate iter_chunks
+    directly so only one chunk is materialized at a time.
+
     Args:
         text: Full text content
         chunk_size: Maximum characters per chunk
         overlap: Number of overlapping characters between chunks
-    
+        normalize: Collapse runs of whitespace to single spaces.
+            Pass False when the source text is already normalized to
+            skip a full O(len) pass and allocation.
+
     Returns:
         List of chunks with metadata
     """
-    chunks = []
-    
-    # Clean text
-    text = re.sub(r'\s+', ' ', text).strip()
-    
+    return list(iter_chunks(text, chunk_size=chunk_size, overlap=overlap,
+                            normalize=normalize))
+
+
+def iter_chunks(text: str, chunk_size: int = 1000, overlap: int = 100,
+                normalize: bool = True):
+    """
+    Yield overlapping text chunks one at a time.
+
+    Generator form of create_text_chunks: downstream stages can fuse
+    chunking with embedding / RDF generation and never hold the full
+    chunk list in memory.
+
+    Chunks carry offsets into the normalized text rather than copies of
+    it - consumers slice text[startPosition:endPosition] just-in-time,
+    so the document content lives in memory exactly once.
+    """
+    # Check the raw length first: a document that already fits in one
+    # chunk can only shrink under normalization, so there is no need to
+    # run the full O(len) collapse pass before the early return
     if len(text) <= chunk_size:
-        # Document fits in single chunk
-        chunks.append({
+        if normalize:
+            text = ' '.join(text.split())
+        yield {
             'chunkId': 0,
-            'text': text,
             'startPosition': 0,
             'endPosition': len(text),
             'length': len(text),
-        })
-        return chunks
-    
+        }
+        return
+
+    # Clean text - str.split/join run in C and beat the equivalent
+    # re.sub(r'\s+', ' ', ...) by ~2x for pure whitespace collapsing
+    if normalize:
+        text = ' '.join(text.split())
+
+    # Precompute all sentence boundaries in one regex sweep; each chunk
+    # then finds its breakpoint with an O(log N) binary search instead
+    # of re-scanning its window with four rfind calls
+    breakpoints = [m.start() + 1 for m in _SENTENCE_BOUNDARY_RE.finditer(text)]
+
     # Split into chunks with overlap
     start = 0
     chunk_id = 0
-    
+
     while start < len(text):
         end = min(start + chunk_size, len(text))
-        
-        # Try to break at sentence boundary
+
+        # Try to break at the last sentence boundary within the window
         if end < len(text):
-            # Look for sentence ending
-            for punct in ['. ', '.\n', '! ', '?\n']:
-                last_punct = text.rfind(punct, start, end)
-                if last_punct != -1:
-                    end = last_punct + 1
-                    break
-        
-        chunk_text = text[start:end].strip()
-        
-        if chunk_text:
-            chunks.append({
+            idx = bisect.bisect_right(breakpoints, end) - 1
+            if idx >= 0 and breakpoints[idx] > start:
+                end = breakpoints[idx]
+
+        chunk_text = text[start:end]
+
+        # Tighten the offsets to the stripped content so that
+        # text[startPosition:endPosition] reproduces the chunk exactly
+        stripped = chunk_text.strip()
+        if stripped:
+            chunk_start = start + (len(chunk_text) - len(chunk_text.lstrip()))
+            chunk_end = chunk_start + len(stripped)
+            yield {
                 'chunkId': chunk_id,
-                'text': chunk_text,
-                'startPosition': start,
-                'endPosition': end,
-                'length': len(chunk_text),
-            })
+                'startPosition': chunk_start,
+                'endPosition': chunk_end,
+                'length': len(stripped),
+            }
             chunk_id += 1
-        
+
         # Move to next chunk with overlap
         start = end - overlap if end < len(text) else len(text)
-    
-    return chunks
 
 
 def extract_document_id(s3_key: str) -> str:
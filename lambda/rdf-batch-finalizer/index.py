@@ -0,0 +1,247 @@
+"""
+RDF Batch Finalizer Lambda Function
+
+Stitches small per-document RDF staging files into larger batch objects
+for Neptune bulk loading. Runs on a schedule; only has work to do when
+the RDF generator writes under the pending/ prefix (RDF_BATCH_MODE).
+
+Neptune's loader performs best on fewer, larger files, and thousands of
+tiny per-document PUTs multiply S3 request charges. This function lists
+neptune-staging/pending/, concatenates the files into a single
+neptune-staging/batches/<batch-id>.ttl.gz via S3 multipart upload,
+deletes the sources, and invokes neptune-writer to bulk load the batch.
+Concatenation is valid at both layers: gzip streams are multi-member,
+and each Turtle file re-declares its own prefixes.
+"""
+
+import json
+import os
+import uuid
+import boto3
+from botocore.config import Config
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List
+
+s3_client = boto3.client('s3', config=Config(
+    max_pool_connections=50,
+    retries={'mode': 'adaptive', 'max_attempts': 3},
+    tcp_keepalive=True,
+))
+lambda_client = boto3.client('lambda')
+
+# Environment variables
+BUCKET_NAME = os.environ['DOCUMENT_BUCKET_NAME']
+PENDING_PREFIX = os.environ.get('RDF_PENDING_PREFIX', 'neptune-staging/pending/')
+BATCH_PREFIX = os.environ.get('RDF_BATCH_PREFIX', 'neptune-staging/batches/')
+
+# neptune-writer is invoked with the batch key once a merge completes,
+# so batches actually reach Neptune (per-document loads are deferred in
+# batch mode)
+NEPTUNE_WRITER_FUNCTION_NAME = os.environ.get('NEPTUNE_WRITER_FUNCTION_NAME', '')
+
+# Leave freshly staged files alone for a while - the upstream Step
+# Functions execution may still be referencing them, and the window
+# comfortably exceeds neptune-writer's 300s load-poll budget
+PENDING_MIN_AGE_SECONDS = int(os.environ.get('RDF_PENDING_MIN_AGE_SECONDS', '900'))
+
+# S3 multipart parts must be at least 5MB except the last. Staging files
+# that clear the bar are stitched server-side with upload_part_copy (no
+# byte ever transits the Lambda); smaller ones are buffered and flushed
+# as combined parts.
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Main handler for RDF batch finalization.
+
+    Input (EventBridge schedule): ignored.
+
+    Output:
+    {
+        "batchS3Key": "neptune-staging/batches/uuid.ttl.gz",
+        "sourceCount": 37,
+        "batchBytes": 1234567,
+        "success": true
+    }
+    """
+    try:
+        pending = list_pending_objects()
+
+        if not pending:
+            print("No pending RDF files to batch")
+            return {'sourceCount': 0, 'success': True}
+
+        batch_id = str(uuid.uuid4())
+        batch_key = f"{BATCH_PREFIX}{batch_id}.ttl.gz"
+
+        print(f"Batching {len(pending)} pending RDF files into {batch_key}")
+
+        batch_bytes = merge_into_batch(pending, batch_key)
+        delete_objects([obj['Key'] for obj in pending])
+
+        print(f"Finalized batch {batch_key} ({batch_bytes} bytes from {len(pending)} files)")
+
+        trigger_batch_load(batch_id, batch_key)
+
+        return {
+            'batchS3Key': batch_key,
+            'batchBucket': BUCKET_NAME,
+            'sourceCount': len(pending),
+            'batchBytes': batch_bytes,
+            'success': True,
+        }
+
+    except Exception as e:
+        print(f"Error finalizing RDF batch: {str(e)}")
+        return {
+            'success': False,
+            'error': str(e),
+            'stage': 'rdf-batch-finalization',
+        }
+
+
+def list_pending_objects() -> List[Dict[str, Any]]:
+    """
+    List staged RDF files under the pending prefix, oldest first so a
+    backlog drains in arrival order. Objects younger than
+    PENDING_MIN_AGE_SECONDS are left for a later tick - their pipeline
+    execution may still be in flight.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=PENDING_MIN_AGE_SECONDS)
+    objects = []
+
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=BUCKET_NAME, Prefix=PENDING_PREFIX):
+        objects.extend(
+            obj for obj in page.get('Contents', [])
+            if obj['LastModified'] <= cutoff
+        )
+
+    objects.sort(key=lambda obj: obj['LastModified'])
+    return objects
+
+
+def merge_into_batch(pending: List[Dict[str, Any]], batch_key: str) -> int:
+    """
+    Concatenate the pending objects into one batch object via multipart
+    upload. Returns the total batch size in bytes.
+
+    S3 rejects any non-final part under 5MB, so ordering matters: all
+    files big enough to be server-side-copied parts go first, then the
+    small files buffered into combined parts - leaving the only
+    possibly-undersized part as the final one, which S3 allows. Turtle
+    semantics don't depend on file order, so giving up strict arrival
+    order is free.
+    """
+    mpu = s3_client.create_multipart_upload(
+        Bucket=BUCKET_NAME,
+        Key=batch_key,
+        ContentType='text/turtle',
+        ContentEncoding='gzip',
+    )
+    upload_id = mpu['UploadId']
+
+    parts = []
+    buffer = bytearray()
+    total_bytes = 0
+
+    def upload_buffered_part() -> None:
+        response = s3_client.upload_part(
+            Bucket=BUCKET_NAME,
+            Key=batch_key,
+            UploadId=upload_id,
+            PartNumber=len(parts) + 1,
+            Body=bytes(buffer),
+        )
+        parts.append({'PartNumber': len(parts) + 1, 'ETag': response['ETag']})
+        buffer.clear()
+
+    try:
+        # Phase 1: every file at or above the part minimum becomes its
+        # own server-side-copied part - no byte transits the Lambda
+        for obj in pending:
+            if obj['Size'] < MIN_PART_SIZE:
+                continue
+            total_bytes += obj['Size']
+            response = s3_client.upload_part_copy(
+                Bucket=BUCKET_NAME,
+                Key=batch_key,
+                UploadId=upload_id,
+                PartNumber=len(parts) + 1,
+                CopySource={'Bucket': BUCKET_NAME, 'Key': obj['Key']},
+            )
+            parts.append({
+                'PartNumber': len(parts) + 1,
+                'ETag': response['CopyPartResult']['ETag'],
+            })
+
+        # Phase 2: buffer small files into combined parts, flushing
+        # whenever the buffer clears the minimum
+        for obj in pending:
+            if obj['Size'] >= MIN_PART_SIZE:
+                continue
+            total_bytes += obj['Size']
+            body = s3_client.get_object(Bucket=BUCKET_NAME, Key=obj['Key'])
+            buffer += body['Body'].read()
+            if len(buffer) >= MIN_PART_SIZE:
+                upload_buffered_part()
+
+        # The final part may be under 5MB
+        if buffer:
+            upload_buffered_part()
+
+        s3_client.complete_multipart_upload(
+            Bucket=BUCKET_NAME,
+            Key=batch_key,
+            UploadId=upload_id,
+            MultipartUpload={'Parts': parts},
+        )
+
+    except Exception:
+        s3_client.abort_multipart_upload(
+            Bucket=BUCKET_NAME,
+            Key=batch_key,
+            UploadId=upload_id,
+        )
+        raise
+
+    return total_bytes
+
+
+def trigger_batch_load(batch_id: str, batch_key: str) -> None:
+    """
+    Hand the finished batch to neptune-writer for bulk loading
+    (async invoke - the writer polls the load itself). Per-document
+    loads are deferred when RDF_BATCH_MODE is on, so this is how
+    batched triples reach Neptune.
+    """
+    if not NEPTUNE_WRITER_FUNCTION_NAME:
+        print("NEPTUNE_WRITER_FUNCTION_NAME not set - batch staged but not loaded")
+        return
+
+    lambda_client.invoke(
+        FunctionName=NEPTUNE_WRITER_FUNCTION_NAME,
+        InvocationType='Event',
+        Payload=json.dumps({
+            'documentId': f'batch-{batch_id}',
+            'rdfS3Key': batch_key,
+            'rdfBucket': BUCKET_NAME,
+        }).encode('utf-8'),
+    )
+    print(f"Triggered Neptune load of {batch_key} via {NEPTUNE_WRITER_FUNCTION_NAME}")
+
+
+def delete_objects(keys: List[str]) -> None:
+    """
+    Delete the merged source objects (delete_objects caps at 1000 keys
+    per call).
+    """
+    for start in range(0, len(keys), 1000):
+        s3_client.delete_objects(
+            Bucket=BUCKET_NAME,
+            Delete={
+                'Objects': [{'Key': key} for key in keys[start:start + 1000]],
+                'Quiet': True,
+            },
+        )
@@ -7,30 +7,63 @@ Supports two modes:
 2. Presigned URL: Generates presigned S3 URL for client-side upload
 """
 
+import io
 import json
 import os
 import base64
 import uuid
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from datetime import datetime
+from functools import lru_cache
 from typing import Dict, Any
+from urllib.parse import urlencode
 
-s3_client = boto3.client('s3')
+# Pooled client reused across warm invocations - adaptive retries and
+# TCP keepalive avoid repeated TLS handshakes under upload bursts
+s3_client = boto3.client('s3', config=Config(
+    max_pool_connections=50,
+    retries={'mode': 'adaptive', 'max_attempts': 3},
+    tcp_keepalive=True,
+))
 
 # Environment variables
 BUCKET_NAME = os.environ['DOCUMENT_BUCKET_NAME']
 MAX_FILE_SIZE_MB = int(os.environ.get('MAX_FILE_SIZE_MB', '50'))
-ALLOWED_FILE_TYPES = os.environ.get('ALLOWED_FILE_TYPES', 'pdf,docx,csv,txt').split(',')
+# frozenset for O(1) membership checks; entries normalized once here
+# rather than per request
+ALLOWED_FILE_TYPES = frozenset(
+    ext.strip().lower()
+    for ext in os.environ.get('ALLOWED_FILE_TYPES', 'pdf,docx,csv,txt').split(',')
+)
 PRESIGNED_URL_EXPIRY = int(os.environ.get('PRESIGNED_URL_EXPIRY_SECONDS', '3600'))
 
+# Multipart upload settings for direct uploads - files above 8MB are
+# split into 8MB parts uploaded on 4 concurrent threads, so peak
+# in-flight memory is a few parts rather than the whole file, and large
+# uploads overlap network transfers instead of one serial PUT
+UPLOAD_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=4,
+)
+
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Main handler for upload requests.
     Routes to appropriate handler based on HTTP method and path.
     """
-    print(f"Received event: {json.dumps(event)}")
-    
+    # The event body holds the whole base64 file - serializing it back
+    # to JSON just to log doubles the upload's CPU cost and leaks file
+    # content into CloudWatch
+    if os.environ.get('DEBUG_LOG_EVENT'):
+        print(f"Received event: {json.dumps(event)}")
+    else:
+        print(f"Received event: method={event.get('httpMethod')} "
+              f"path={event.get('path')}")
+
     try:
         http_method = event.get('httpMethod', '')
         path = event.get('path', '')
@@ -73,17 +106,23 @@ def handle_direct_upload(event: Dict[str, Any]) -> Dict[str, Any]:
             return create_response(400, {'error': 'fileName and fileContent are required'})
         
         # Validate file type
-        file_extension = file_name.split('.')[-1].lower()
+        file_extension = os.path.splitext(file_name)[1][1:].lower()
         if file_extension not in ALLOWED_FILE_TYPES:
             return create_response(400, {
-                'error': f'File type .{file_extension} not allowed. Allowed types: {ALLOWED_FILE_TYPES}'
+                'error': f'File type .{file_extension} not allowed. Allowed types: {sorted(ALLOWED_FILE_TYPES)}'
             })
         
-        # Decode file content
+        # Decode file content - validate=True rejects stray characters
+        # in C instead of silently skipping them
         try:
-            file_content = base64.b64decode(file_content_base64)
+            file_content = base64.b64decode(file_content_base64, validate=True)
         except Exception as e:
             return create_response(400, {'error': f'Invalid base64 content: {str(e)}'})
+
+        # The base64 string is 4/3 the file size and both it and the
+        # parsed body would otherwise sit in memory alongside the
+        # decoded bytes until the upload finishes - release them now
+        del file_content_base64, body
         
         # Validate file size
         file_size_mb = len(file_content) / (1024 * 1024)
@@ -95,12 +134,16 @@ def handle_direct_upload(event: Dict[str, Any]) -> Dict[str, Any]:
         # Generate unique document ID and S3 key
         document_id = str(uuid.uuid4())
         s3_key = f"documents/{document_id}/{file_name}"
-        
+
+        # One clock read per upload - metadata timestamp and tag date
+        # come from the same instant
+        now = datetime.utcnow()
+
         # Prepare S3 metadata and tags
         s3_metadata = {
             'document-id': document_id,
             'original-filename': file_name,
-            'upload-timestamp': datetime.utcnow().isoformat(),
+            'upload-timestamp': now.isoformat(),
         }
         
         # Add custom metadata
@@ -112,7 +155,7 @@ def handle_direct_upload(event: Dict[str, Any]) -> Dict[str, Any]:
         tags = {
             'DocumentId': document_id,
             'FileName': file_name,
-            'UploadDate': datetime.utcnow().strftime('%Y-%m-%d'),
+            'UploadDate': now.strftime('%Y-%m-%d'),
         }
         
         if 'keywords' in metadata:
@@ -120,17 +163,22 @@ def handle_direct_upload(event: Dict[str, Any]) -> Dict[str, Any]:
         if 'documentType' in metadata:
             tags['DocumentType'] = metadata['documentType']
         
-        # Convert tags to S3 format
-        tag_set = '&'.join([f'{k}={v}' for k, v in tags.items()])
-        
-        # Upload to S3
-        s3_client.put_object(
-            Bucket=BUCKET_NAME,
-            Key=s3_key,
-            Body=file_content,
-            Metadata=s3_metadata,
-            Tagging=tag_set,
-            ServerSideEncryption='AES256',
+        # Convert tags to S3 format - urlencode percent-escapes values
+        # containing '&', '=', or spaces (keywords come from user input)
+        tag_set = urlencode(tags)
+        
+        # Upload to S3 - upload_fileobj streams from the buffer and
+        # switches to concurrent multipart parts past the threshold
+        s3_client.upload_fileobj(
+            io.BytesIO(file_content),
+            BUCKET_NAME,
+            s3_key,
+            ExtraArgs={
+                'Metadata': s3_metadata,
+                'Tagging': tag_set,
+                'ServerSideEncryption': 'AES256',
+            },
+            Config=UPLOAD_TRANSFER_CONFIG,
         )
         
         print(f"Successfully uploaded document {document_id} to {s3_key}")
@@ -173,17 +221,15 @@ def handle_presigned_url_request(event: Dict[str, Any]) -> Dict[str, Any]:
             return create_response(400, {'error': 'fileName query parameter is required'})
         
         # Validate file type
-        file_extension = file_name.split('.')[-1].lower()
+        file_extension = os.path.splitext(file_name)[1][1:].lower()
         if file_extension not in ALLOWED_FILE_TYPES:
             return create_response(400, {
-                'error': f'File type .{file_extension} not allowed. Allowed types: {ALLOWED_FILE_TYPES}'
+                'error': f'File type .{file_extension} not allowed. Allowed types: {sorted(ALLOWED_FILE_TYPES)}'
             })
         
-        # Parse metadata
-        try:
-            metadata = json.loads(metadata_json)
-        except:
-            metadata = {}
+        # Parse metadata - clients tend to send the same small JSON
+        # blob on every request, so warm containers hit the cache
+        metadata = parse_metadata_json(metadata_json)
         
         # Generate unique document ID and S3 key
         document_id = str(uuid.uuid4())
@@ -233,6 +279,22 @@ def handle_presigned_url_request(event: Dict[str, Any]) -> Dict[str, Any]:
         return create_response(500, {'error': f'Failed to generate presigned URL: {str(e)}'})
 
 
+@lru_cache(maxsize=256)
+def parse_metadata_json(metadata_json: str) -> Dict[str, Any]:
+    """
+    Parse the metadata query parameter, falling back to {} on invalid
+    JSON (matching the previous lenient behavior).
+
+    Memoized with a small bound - the string is client-controllable, so
+    an unbounded cache would be a memory-growth vector. Callers must
+    treat the returned dict as read-only: it is shared across hits.
+    """
+    try:
+        return json.loads(metadata_json) if metadata_json else {}
+    except (ValueError, TypeError):
+        return {}
+
+
 def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
     """
     Create standardized API Gateway response with CORS headers.
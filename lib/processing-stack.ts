@@ -5,6 +5,8 @@ import * as s3 from 'aws-cdk-lib/aws-s3';
 import * as neptune from 'aws-cdk-lib/aws-neptune';
 import * as opensearch from 'aws-cdk-lib/aws-opensearchservice';
 import * as iam from 'aws-cdk-lib/aws-iam';
+import * as events from 'aws-cdk-lib/aws-events';
+import * as targets from 'aws-cdk-lib/aws-events-targets';
 import { Construct } from 'constructs';
 
 /**
@@ -85,6 +87,8 @@ export class ProcessingStack extends cdk.Stack {
       environment: {
         ...commonEnvironment,
         MAX_FILE_SIZE_MB: '50', // Maximum file size to process
+        CHUNK_SIZE_CHARS: '6000', // ~1500 tokens - well inside Titan's 8K-token limit
+        CHUNK_OVERLAP_CHARS: '200',
       },
       
       // Use ARM architecture (Graviton2) for cost savings
@@ -140,6 +144,56 @@ export class ProcessingStack extends cdk.Stack {
     // Grant S3 read/write (for staging RDF files)
     documentBucket.grantReadWrite(this.rdfGeneratorFunction);
 
+    /**
+     * ============================================================
+     * 2b. RDF BATCH FINALIZER LAMBDA (optional, RDF_BATCH_MODE)
+     * ============================================================
+     *
+     * Stitches small per-document RDF files into larger batch objects.
+     *
+     * Neptune's bulk loader performs best on fewer, larger files, and
+     * thousands of tiny staging objects multiply S3 PUT charges. When
+     * the RDF generator runs with RDF_BATCH_MODE=true it stages output
+     * under neptune-staging/pending/; this function periodically merges
+     * those files into neptune-staging/batches/<batch-id>.ttl.gz using
+     * S3 multipart upload (server-side copy where possible), deletes
+     * the sources, and invokes the Neptune writer with the batch key
+     * (per-document loads are deferred in batch mode). Files younger
+     * than RDF_PENDING_MIN_AGE_SECONDS are skipped so in-flight
+     * executions are never raced. A no-op while the pending prefix is
+     * empty.
+     */
+    const rdfBatchFinalizerFunction = new lambda.Function(this, 'RdfBatchFinalizerFunction', {
+      functionName: 'graph-rag-rdf-batch-finalizer',
+      runtime: lambda.Runtime.PYTHON_3_12,
+      handler: 'index.handler',
+      code: lambda.Code.fromAsset('lambda/rdf-batch-finalizer'),
+      timeout: cdk.Duration.minutes(5),
+      memorySize: 512, // MB (buffers sub-5MB files into multipart parts)
+
+      vpc: vpc,
+      vpcSubnets: { subnetType: ec2.SubnetType.PRIVATE_WITH_EGRESS },
+      securityGroups: [lambdaSecurityGroup],
+
+      environment: {
+        ...commonEnvironment,
+      },
+
+      architecture: lambda.Architecture.ARM_64,
+
+      description: 'Merges small staged RDF files into batch objects for Neptune bulk loading',
+    });
+
+    // Grant S3 read/write/delete over the staging area
+    documentBucket.grantReadWrite(rdfBatchFinalizerFunction, 'neptune-staging/*');
+    documentBucket.grantDelete(rdfBatchFinalizerFunction, 'neptune-staging/pending/*');
+
+    // Drain the pending prefix every 5 minutes
+    new events.Rule(this, 'RdfBatchFinalizerSchedule', {
+      schedule: events.Schedule.rate(cdk.Duration.minutes(5)),
+      targets: [new targets.LambdaFunction(rdfBatchFinalizerFunction)],
+    });
+
     /**
      * ============================================================
      * 3. NEPTUNE WRITER LAMBDA
@@ -223,6 +277,10 @@ export class ProcessingStack extends cdk.Stack {
     // Update Lambda environment with bulk load role ARN
     this.neptuneWriterFunction.addEnvironment('NEPTUNE_LOAD_FROM_S3_ROLE_ARN', neptuneBulkLoadRole.roleArn);
 
+    // The batch finalizer hands finished batches to the Neptune writer
+    rdfBatchFinalizerFunction.addEnvironment('NEPTUNE_WRITER_FUNCTION_NAME', this.neptuneWriterFunction.functionName);
+    this.neptuneWriterFunction.grantInvoke(rdfBatchFinalizerFunction);
+
     /**
      * ============================================================
      * 4. EMBEDDING GENERATOR LAMBDA
@@ -274,6 +332,10 @@ export class ProcessingStack extends cdk.Stack {
      * For production, restrict to specific endpoint ARN:
      * `arn:aws:sagemaker:${this.region}:${this.account}:endpoint/your-endpoint-name`
      */
+    // Large embedding sets are staged to S3 as JSONL instead of being
+    // inlined in the Step Functions state (256 KB payload limit)
+    documentBucket.grantWrite(this.embeddingGeneratorFunction, 'embeddings-staging/*');
+
     this.embeddingGeneratorFunction.addToRolePolicy(new iam.PolicyStatement({
       effect: iam.Effect.ALLOW,
       actions: [
@@ -331,6 +393,9 @@ export class ProcessingStack extends cdk.Stack {
      * Grant OpenSearch access
      * Lambda needs to write to OpenSearch domain
      */
+    // Read embedding sets staged to S3 by the embedding generator
+    documentBucket.grantRead(this.openSearchWriterFunction, 'embeddings-staging/*');
+
     this.openSearchWriterFunction.addToRolePolicy(new iam.PolicyStatement({
       effect: iam.Effect.ALLOW,
       actions: [